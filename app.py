@@ -16,8 +16,11 @@ if project_root not in sys.path:
 
 # *** IMPORTANT: CHANGE THESE LINES TO ABSOLUTE IMPORTS ***
 # REMOVE THE try-except BLOCK. It is not needed anymore.
-from my_photo_app.aws_utils import get_aws_clients, upload_file_to_s3, save_metadata_to_dynamodb, get_photos_from_dynamodb, get_s3_object_data
+from my_photo_app.aws_utils import get_aws_clients, upload_file_to_s3, save_metadata_to_dynamodb, get_s3_object_data
 from my_photo_app.config import S3_BUCKET_NAME # For display purposes if needed
+from my_photo_app.config import OPTIMIZE_UPLOADS, CONVERT_UPLOADS_TO, CONVERT_QUALITY, KEEP_ORIGINAL_UPLOADS, OPTIMIZE_MAX_WORKERS
+from my_photo_app.image_utils import optimize_uploads, format_bytes
+from my_photo_app.gallery_sync import sync_gallery
 
 # --- Custom CSS for Professional Look & Feel ---
 # Define custom_css variable FIRST
@@ -375,15 +378,30 @@ with tab1:
                 st.session_state.upload_messages = [] # Clear previous messages on new upload attempt
                 with st.spinner("Uploading photos to AWS... This might take a moment."):
                     success_count = 0
-                    for detail in photo_details:
+
+                    # Optimize the whole batch up front on the process pool (lossless re-encode + metadata strip)
+                    optimized_results = [None] * len(photo_details)
+                    if OPTIMIZE_UPLOADS:
+                        optimized_results, batch_summary = optimize_uploads(
+                            [(detail['file'].name, detail['file'].getvalue()) for detail in photo_details],
+                            convert_to=CONVERT_UPLOADS_TO,
+                            keep_original=KEEP_ORIGINAL_UPLOADS,
+                            convert_quality=CONVERT_QUALITY,
+                            max_workers=OPTIMIZE_MAX_WORKERS,
+                        )
+
+                    for detail, optimized in zip(photo_details, optimized_results):
                         photo_id = str(uuid.uuid4())
-                        s3_key, s3_url = upload_file_to_s3(s3_client, detail['file'])
+                        s3_key, s3_url = upload_file_to_s3(s3_client, detail['file'], optimized=optimized)
+                        saved_note = ""
+                        if optimized and optimized['bytes_saved'] > 0:
+                            saved_note = f" (saved {format_bytes(optimized['bytes_saved'])})"
                         
                         if s3_key and s3_url:
                             # Only try to save metadata if DynamoDB is available
                             if dynamodb_table:
                                 if save_metadata_to_dynamodb(dynamodb_table, photo_id, s3_key, s3_url, detail['description'], detail['file'].name):
-                                    st.session_state.upload_messages.append(f"✅ Uploaded '{detail['file'].name}' successfully! [View on S3]({s3_url})")
+                                    st.session_state.upload_messages.append(f"✅ Uploaded '{detail['file'].name}' successfully!{saved_note} [View on S3]({s3_url})")
                                     success_count += 1
                                 else:
                                     st.session_state.upload_messages.append(f"❌ Failed to save metadata for '{detail['file'].name}'. (DynamoDB might be unavailable)") #
@@ -392,6 +410,13 @@ with tab1:
                                 success_count += 1 # Count S3 upload as success even if no DB
                         else:
                             st.session_state.upload_messages.append(f"❌ Failed to upload '{detail['file'].name}' to S3.")
+
+                    if OPTIMIZE_UPLOADS and batch_summary['original_size'] > 0:
+                        saved_percent = 100 * batch_summary['bytes_saved'] / batch_summary['original_size']
+                        st.session_state.upload_messages.append(
+                            f"ℹ️ Batch optimized: {format_bytes(batch_summary['original_size'])} → "
+                            f"{format_bytes(batch_summary['optimized_size'])} (saved {format_bytes(batch_summary['bytes_saved'])}, {saved_percent:.1f}%)"
+                        )
                     
                     if success_count == len(photo_details) and success_count > 0:
                         st.balloons()
@@ -404,6 +429,8 @@ with tab1:
                         st.error(msg)
                     elif "⚠️" in msg:
                         st.warning(msg)
+                    elif "ℹ️" in msg:
+                        st.info(msg)
                 
                 # Clear messages after displaying them (optional, can keep for user to review)
                 # st.session_state.upload_messages = [] 
@@ -424,7 +451,8 @@ with tab2:
     else:
         st.write("Browse through all the cherished moments shared by your family.")
 
-        all_photos_metadata = get_photos_from_dynamodb(dynamodb_table)
+        # Full load on the first visit, then only photos changed since this session's last sync
+        all_photos_metadata = sync_gallery(dynamodb_table, st.session_state)
         
         st.subheader("Shared Photos:")
 
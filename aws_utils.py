@@ -3,10 +3,18 @@
 import boto3
 import uuid
 import datetime
+import time
+from boto3.dynamodb.conditions import Key, Attr
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
 
 # Import configuration from config.py
-from .config import S3_BUCKET_NAME, DYNAMODB_TABLE_NAME, AWS_REGION
+from .config import S3_BUCKET_NAME, DYNAMODB_TABLE_NAME, AWS_REGION, DYNAMODB_UPDATED_INDEX_NAME, DYNAMODB_INDEX_RETRY_SECONDS
+
+# Partition key shared by all family uploads
+GALLERY_USER_ID = 'anonymous_family_uploads'
+
+# When the updated_timestamp index was last found missing in this process (0 if it never was)
+_updated_index_missing_at = 0.0
 
 # Initialize AWS clients (use session state in app.py for caching)
 def get_aws_clients():
@@ -59,23 +67,51 @@ def get_aws_clients():
     return s3_client, dynamodb_table # Always return both, s3_client will be valid, dynamodb_table might be None
 
 
+def create_dynamodb_table():
+    """Creates a new DynamoDB Table resource. boto3 resources are not thread-safe, so background threads need their own."""
+    session = boto3.Session(region_name=AWS_REGION)
+    return session.resource('dynamodb').Table(DYNAMODB_TABLE_NAME)
+
+
 # --- Ensure dependent functions can handle dynamodb_table being None ---
 
-def upload_file_to_s3(s3_client, uploaded_file):
-    """Uploads a file object to S3 and returns the S3 key and public URL."""
+def upload_file_to_s3(s3_client, uploaded_file, optimized=None):
+    """
+    Uploads a file object to S3 and returns the S3 key and public URL.
+    If `optimized` (a result from image_utils.optimize_image_bytes) is given, its bytes are stored instead,
+    and any kept original is stored alongside under originals/<same id>.<original extension>.
+    """
     if not s3_client: # Add this check
         print("Error: S3 client not initialized. Cannot upload file.")
         return None, None
     try:
         file_extension = uploaded_file.name.split('.')[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}" # Generate a unique filename
+        body = uploaded_file.getvalue()
+        content_type = uploaded_file.type
+        if optimized:
+            file_extension = optimized['extension'] or file_extension
+            body = optimized['data']
+            content_type = optimized['content_type'] or content_type
+
+        file_id = uuid.uuid4()
+        unique_filename = f"{file_id}.{file_extension}" # Generate a unique filename
         
         s3_client.put_object(
             Bucket=S3_BUCKET_NAME,
             Key=unique_filename,
-            Body=uploaded_file.getvalue(),
-            ContentType=uploaded_file.type # Set content type for proper display
+            Body=body,
+            ContentType=content_type # Set content type for proper display
         )
+
+        if optimized and optimized.get('original'):
+            # Keep the untouched upload next to the converted copy
+            original_extension = uploaded_file.name.split('.')[-1]
+            s3_client.put_object(
+                Bucket=S3_BUCKET_NAME,
+                Key=f"originals/{file_id}.{original_extension}",
+                Body=optimized['original'],
+                ContentType=uploaded_file.type
+            )
         
         public_url = f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{unique_filename}"
         
@@ -100,14 +136,16 @@ def save_metadata_to_dynamodb(dynamodb_table, photo_id, s3_key, s3_url, descript
 
         dynamodb_table.put_item(
             Item={
-                'user_id': 'anonymous_family_uploads', # Use uploader as user_id --> PK
+                'user_id': GALLERY_USER_ID, # Use uploader as user_id --> PK
                 'photo_id': photo_id, # Sort key for DynamoDB
                 's3_key': s3_key, # Store the S3 key for later retrieval
                 's3_url': s3_url,
                 'description': processed_description, # Use the explicitly processed description
                 'original_filename': original_filename,
                 'uploader': 'anonymous', # Default uploader
-                'upload_timestamp': t # Milliseconds since epoch
+                'upload_timestamp': t, # Milliseconds since epoch
+                'updated_timestamp': t, # Bumped on every edit/delete so open galleries can delta-sync
+                'version': 1
             }
         )
         print(f"Metadata for {original_filename} saved successfully to DynamoDB.") # Added this print for success feedback
@@ -128,8 +166,7 @@ def get_photos_from_dynamodb(dynamodb_table):
         print("ERROR: DynamoDB table is not available. Cannot retrieve photos.")
         return []
     try:
-        response = dynamodb_table.scan()
-        photos = response['Items']
+        photos = [item for item in scan_all_photos(dynamodb_table) if not item.get('deleted')] # Skip soft-deleted photos
         # Sort by timestamp in descending order (most recent first)
         photos.sort(key=lambda x: x.get('upload_timestamp', 0), reverse=True)
         return photos
@@ -137,6 +174,115 @@ def get_photos_from_dynamodb(dynamodb_table):
         print(f"Error retrieving photos from DynamoDB: {e}")
         return []
 
+def scan_all_photos(dynamodb_table):
+    """Scans every item in the table (including tombstones), following LastEvaluatedKey. Raises on error."""
+    items = []
+    scan_kwargs = {}
+    while True:
+        response = dynamodb_table.scan(**scan_kwargs)
+        items.extend(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return items
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def get_photo_changes_since(dynamodb_table, since_timestamp):
+    """
+    Retrieves photo items created, edited or deleted at or after since_timestamp (ms since epoch),
+    oldest change first. Uses the updated_timestamp index so only changed items are read.
+    Returns None on failure so callers can keep their current view.
+    """
+    if not dynamodb_table:
+        print("ERROR: DynamoDB table is not available. Cannot retrieve photo changes.")
+        return None
+
+    global _updated_index_missing_at
+    key_condition = Key('user_id').eq(GALLERY_USER_ID)
+    changes = None
+    if time.time() - _updated_index_missing_at >= DYNAMODB_INDEX_RETRY_SECONDS:
+        query_kwargs = {
+            'IndexName': DYNAMODB_UPDATED_INDEX_NAME,
+            # >= rather than > so items written in the same millisecond as the last sync are not missed.
+            # Merging is idempotent, so re-reading the newest item is harmless.
+            'KeyConditionExpression': key_condition & Key('updated_timestamp').gte(since_timestamp),
+        }
+        try:
+            changes = _query_all_pages(dynamodb_table, query_kwargs)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ValidationException':
+                print(f"Error retrieving photo changes from DynamoDB: {e}")
+                return None
+            # Index not created yet (or still backfilling): don't pay for the failed query on every rerun
+            print(f"AWS Utils WARNING: Index '{DYNAMODB_UPDATED_INDEX_NAME}' not usable, falling back to a filtered query "
+                  f"for the next {DYNAMODB_INDEX_RETRY_SECONDS} s. Run scripts/create_dynamodb_index.sh to create it. Error: {e}")
+            _updated_index_missing_at = time.time()
+        except Exception as e:
+            print(f"Error retrieving photo changes from DynamoDB: {e}")
+            return None
+
+    if changes is None:
+        # Read the whole partition and filter (correct, but not cheap)
+        query_kwargs = {
+            'KeyConditionExpression': key_condition,
+            'FilterExpression': Attr('updated_timestamp').gte(since_timestamp),
+        }
+        try:
+            changes = _query_all_pages(dynamodb_table, query_kwargs)
+        except Exception as e:
+            print(f"Error retrieving photo changes from DynamoDB: {e}")
+            return None
+
+    changes.sort(key=lambda x: x.get('updated_timestamp', 0))
+    return changes
+
+def _query_all_pages(dynamodb_table, query_kwargs):
+    """Runs a DynamoDB query and follows LastEvaluatedKey until all pages are read."""
+    items = []
+    while True:
+        response = dynamodb_table.query(**query_kwargs)
+        items.extend(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return items
+        query_kwargs = dict(query_kwargs, ExclusiveStartKey=response['LastEvaluatedKey'])
+
+def update_photo_description(dynamodb_table, photo_id, description):
+    """Updates a photo's description and bumps its version so open galleries pick up the edit."""
+    if not dynamodb_table:
+        print("ERROR: DynamoDB table is not available. Cannot update photo.")
+        return False
+    try:
+        t = int(datetime.datetime.now().timestamp() * 1000)
+        dynamodb_table.update_item(
+            Key={'user_id': GALLERY_USER_ID, 'photo_id': photo_id},
+            UpdateExpression='SET description = :d, updated_timestamp = :t ADD version :one',
+            ExpressionAttributeValues={':d': str(description) if description is not None else "", ':t': t, ':one': 1},
+            ConditionExpression=Attr('photo_id').exists()
+        )
+        return True
+    except Exception as e:
+        print(f"Error updating photo {photo_id} in DynamoDB: {e}")
+        return False
+
+def mark_photo_deleted(dynamodb_table, photo_id):
+    """
+    Soft-deletes a photo by writing a tombstone (deleted=True) instead of removing the item,
+    so sessions that already loaded it see the delete on their next delta sync.
+    """
+    if not dynamodb_table:
+        print("ERROR: DynamoDB table is not available. Cannot delete photo.")
+        return False
+    try:
+        t = int(datetime.datetime.now().timestamp() * 1000)
+        dynamodb_table.update_item(
+            Key={'user_id': GALLERY_USER_ID, 'photo_id': photo_id},
+            UpdateExpression='SET deleted = :true, updated_timestamp = :t ADD version :one',
+            ExpressionAttributeValues={':true': True, ':t': t, ':one': 1},
+            ConditionExpression=Attr('photo_id').exists()
+        )
+        return True
+    except Exception as e:
+        print(f"Error deleting photo {photo_id} in DynamoDB: {e}")
+        return False
+
 def get_s3_object_data(s3_client, s3_key):
     """Fetches image data from S3 for zipping."""
     if not s3_client: # Add this check
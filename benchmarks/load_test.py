@@ -0,0 +1,434 @@
+# my_photo_app/benchmarks/load_test.py
+#
+# Concurrent-session load test for app.py, built on streamlit.testing.v1.AppTest.
+#
+# Simulates N sessions against in-memory S3/DynamoDB stand-ins (benchmarks/local_aws.py). Each session
+# runs a random mix of interactions:
+#   browse  - rerun the app (gallery refresh / delta sync)
+#   toggle  - check or uncheck one photo
+#   zip     - select a few photos and rerun, which builds the download zip from S3
+#   upload  - upload a batch of generated images and rerun
+# Each session runs in its own process: AppTest keeps its runtime in a process-wide global, so several
+# AppTests on threads of one process interfere with each other. The stand-ins' data lives in a
+# multiprocessing manager, so all sessions still see the same photos and each other's uploads.
+# Unlike the Streamlit server, every session process therefore has its own gallery base and image
+# optimization pool. The harness reports rerun latency percentiles, AWS calls per interaction and
+# image pool fallbacks, plus CPU and RSS sampled over time for the whole process tree (session processes,
+# the manager and the image optimization workers).
+#
+# AppTest cannot drive st.file_uploader, so 'upload' calls the same functions as the
+# "Upload All Photos" button handler (optimize_uploads -> upload_file_to_s3 -> save_metadata_to_dynamodb),
+# then reruns the app the way the handler does.
+#
+# Requires psutil on top of the app's requirements: pip install -r requirements-dev.txt
+# Like app.py, the harness imports the app as the my_photo_app package, so the checkout directory
+# must be named my_photo_app (as it is on the EC2 host).
+#
+# Usage: python benchmarks/load_test.py --sessions 8 --interactions 25 --photos 200
+
+import argparse
+import io
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter, defaultdict
+
+# Ensure project root is in sys.path (same as app.py)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import psutil
+from PIL import Image
+from streamlit.testing.v1 import AppTest
+
+from my_photo_app import gallery_sync, image_utils
+from my_photo_app.aws_utils import GALLERY_USER_ID, upload_file_to_s3, save_metadata_to_dynamodb
+from my_photo_app.config import S3_BUCKET_NAME, AWS_REGION, OPTIMIZE_UPLOADS, CONVERT_UPLOADS_TO, CONVERT_QUALITY, KEEP_ORIGINAL_UPLOADS, OPTIMIZE_MAX_WORKERS
+from my_photo_app.image_utils import optimize_uploads
+from my_photo_app.benchmarks.local_aws import LocalS3Client, LocalDynamoDBTable
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+INTERACTIONS = ('browse', 'toggle', 'zip', 'upload')
+DEFAULT_WEIGHTS = (50, 30, 10, 10)
+PHOTO_CHECKBOX_PREFIX = 'photo_checkbox_'
+
+
+class GeneratedUpload:
+    """Stands in for Streamlit's UploadedFile (name, type, getvalue())."""
+
+    def __init__(self, name, data, content_type):
+        self.name = name
+        self.type = content_type
+        self._data = data
+
+    def getvalue(self):
+        return self._data
+
+
+def make_image_bytes(rng, image_format, size=(1280, 960)):
+    """Generates a photo-like image (gradient + noise) so encoders have realistic work to do."""
+    image = Image.linear_gradient('L').resize(size).convert('RGB')
+    noise = Image.effect_noise(size, rng.randint(20, 60)).convert('RGB')
+    image = Image.blend(image, noise, 0.3)
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **({'quality': 92} if image_format == 'JPEG' else {}))
+    return buffer.getvalue()
+
+
+def seed_photos(s3_client, dynamodb_table, count, rng):
+    """Puts `count` photos into the stand-ins, bypassing call counting of any session."""
+    image_bytes = make_image_bytes(rng, 'JPEG', size=(320, 240))
+    now = int(time.time() * 1000)
+    for i in range(count):
+        key = f"{uuid.uuid4()}.jpg"
+        t = now - (count - i) * 60000
+        s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=key, Body=image_bytes, ContentType='image/jpeg')
+        dynamodb_table.put_item(Item={
+            'user_id': GALLERY_USER_ID,
+            'photo_id': f"{uuid.uuid4()}{t}",
+            's3_key': key,
+            's3_url': f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}",
+            'description': f"Seed photo {i}",
+            'original_filename': f"IMG_{i:05d}.jpg",
+            'uploader': 'anonymous',
+            'upload_timestamp': t,
+            'updated_timestamp': t,
+            'version': 1,
+        })
+
+
+def process_tree_usage(process, cpu_seen):
+    """
+    Returns (cpu seconds, rss bytes, process count) for process and all its live descendants.
+    cpu_seen maps (pid, create time) -> the last CPU seconds seen for every process sampled so far and is
+    updated in place. Processes that exited keep counting with that last value: their time isn't reliably
+    added to our children_* times (pool workers are children of the forkserver, not of this process),
+    so totals never go backwards. CPU used after a process's last sample is lost.
+    """
+    rss = 0
+    count = 0
+    for member in [process] + process.children(recursive=True):
+        try:
+            with member.oneshot():
+                cpu_times = member.cpu_times()
+                cpu_seen[(member.pid, member.create_time())] = cpu_times.user + cpu_times.system
+                rss += member.memory_info().rss
+            count += 1
+        except psutil.NoSuchProcess:
+            pass # Exited between listing and sampling
+    return sum(cpu_seen.values()), rss, count
+
+
+class ResourceSampler:
+    """Samples CPU % (100 = one core) and RSS of the harness and its worker processes on a background thread."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = [] # (seconds since start, cpu %, rss bytes, process count)
+        self._process = psutil.Process()
+        self._cpu_seen = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        start = last_wall = time.perf_counter()
+        last_cpu = process_tree_usage(self._process, self._cpu_seen)[0]
+        while not self._stop.wait(self.interval):
+            wall = time.perf_counter()
+            cpu, rss, count = process_tree_usage(self._process, self._cpu_seen)
+            cpu_percent = 100 * (cpu - last_cpu) / (wall - last_wall)
+            self.samples.append((wall - start, cpu_percent, rss, count))
+            last_wall, last_cpu = wall, cpu
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class Session:
+    """One simulated browser session: an AppTest instance with its own (counting) AWS clients."""
+
+    def __init__(self, index, s3_root, table_root, args):
+        self.index = index
+        self.rng = random.Random(args.seed + index)
+        self.args = args
+        self.s3_client = s3_root.for_session()
+        self.dynamodb_table = table_root.for_session()
+        self.results = [] # (interaction, seconds, aws call counts, error or None)
+        self.pool_fallbacks = 0 # Upload batches the image pool failed on and were optimized in-process
+
+        self.app = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+        # The app keeps its clients in session state, so pre-seeding them skips get_aws_clients()
+        self.app.session_state['s3_client'] = self.s3_client
+        self.app.session_state['dynamodb_table'] = self.dynamodb_table
+
+    def _aws_calls(self):
+        return self.s3_client.calls.snapshot() + self.dynamodb_table.calls.snapshot()
+
+    def _measure(self, interaction, action):
+        calls_before = self._aws_calls()
+        start = time.perf_counter()
+        error = None
+        try:
+            action()
+            if self.app.exception:
+                error = str(self.app.exception[0].value)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - start
+        calls = self._aws_calls()
+        calls.subtract(calls_before)
+        self.results.append((interaction, elapsed, +calls, error))
+
+    def _photo_checkboxes(self):
+        return [cb for cb in self.app.checkbox if cb.key and cb.key.startswith(PHOTO_CHECKBOX_PREFIX)]
+
+    def browse(self):
+        self._measure('browse', self.app.run)
+
+    def toggle(self):
+        checkboxes = self._photo_checkboxes()
+        if not checkboxes:
+            return self.browse()
+        checkbox = self.rng.choice(checkboxes)
+        checkbox.set_value(not checkbox.value)
+        self._measure('toggle', self.app.run)
+
+    def zip(self):
+        unchecked = [cb for cb in self._photo_checkboxes() if not cb.value]
+        picked = self.rng.sample(unchecked, min(self.args.zip_size, len(unchecked)))
+        for checkbox in picked:
+            checkbox.check()
+        self._measure('zip', self.app.run)
+        # Deselect again (not measured) so selections don't pile up over the run
+        for checkbox in self._photo_checkboxes():
+            if checkbox.key in {cb.key for cb in picked}:
+                checkbox.uncheck()
+        self.app.run()
+
+    def upload(self):
+        batch = []
+        for i in range(self.args.upload_batch):
+            image_format = self.rng.choice(('JPEG', 'PNG'))
+            extension = 'jpg' if image_format == 'JPEG' else 'png'
+            batch.append(GeneratedUpload(
+                f"session{self.index}_{uuid.uuid4().hex[:8]}.{extension}",
+                make_image_bytes(self.rng, image_format),
+                f"image/{image_format.lower()}"
+            ))
+
+        def do_upload():
+            optimized_results = [None] * len(batch)
+            if OPTIMIZE_UPLOADS:
+                optimized_results, summary = optimize_uploads(
+                    [(f.name, f.getvalue()) for f in batch],
+                    convert_to=CONVERT_UPLOADS_TO,
+                    keep_original=KEEP_ORIGINAL_UPLOADS,
+                    convert_quality=CONVERT_QUALITY,
+                    max_workers=OPTIMIZE_MAX_WORKERS,
+                )
+                if summary['pool_fallback']:
+                    self.pool_fallbacks += 1
+            for uploaded_file, optimized in zip(batch, optimized_results):
+                s3_key, s3_url = upload_file_to_s3(self.s3_client, uploaded_file, optimized=optimized)
+                if s3_key and s3_url:
+                    save_metadata_to_dynamodb(self.dynamodb_table, str(uuid.uuid4()), s3_key, s3_url, "", uploaded_file.name)
+            self.app.run()
+
+        self._measure('upload', do_upload)
+
+    def run(self):
+        self._measure('open', self.app.run)
+        for _ in range(self.args.interactions):
+            interaction = self.rng.choices(INTERACTIONS, weights=self.args.weights)[0]
+            getattr(self, interaction)()
+            if self.args.think_time:
+                time.sleep(self.rng.uniform(0, self.args.think_time))
+        return self.results
+
+
+def run_session_process(index, args, backend, snapshot_path, messages, start):
+    """
+    Entry point of one session process. Reports ('ready', index) once the app is loaded, waits for `start`,
+    then reports ('done', index, results, pool_fallbacks), or ('failed', index, traceback) at any point.
+    """
+    try:
+        s3_objects, s3_lock, table_items, table_lock = backend
+        s3_root = LocalS3Client(s3_objects, s3_lock)
+        table_root = LocalDynamoDBTable(items=table_items, lock=table_lock)
+        # Keep the run's metadata snapshot away from the real one
+        gallery_sync.METADATA_SNAPSHOT_PATH = snapshot_path
+        # Background reconciles build their own table; point them at the stand-in instead of AWS
+        gallery_sync.create_dynamodb_table = table_root.for_session
+
+        session = Session(index, s3_root, table_root, args)
+        messages.put(('ready', index))
+        start.wait()
+        results = session.run()
+        messages.put(('done', index, results, session.pool_fallbacks))
+    except BaseException:
+        messages.put(('failed', index, traceback.format_exc()))
+    finally:
+        # A process started by multiprocessing joins its children before the interpreter shuts the pool
+        # down, and closes the pool's queues before its workers are told to stop, so shut it down here
+        image_utils._reset_process_pool(wait=True)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(p / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_sessions(processes, messages, start):
+    """
+    Starts the session processes, releases them together once all are ready, and collects their reports.
+    Returns (results, pool_fallbacks, failures, wall seconds); a process that dies without reporting is a failure.
+    """
+    for process in processes:
+        process.start()
+
+    pending = set(range(len(processes)))
+    waiting_for_ready = set(pending)
+    results = []
+    pool_fallbacks = 0
+    failures = {}
+    start_time = None
+    while pending:
+        if not waiting_for_ready and start_time is None:
+            start.set()
+            start_time = time.perf_counter()
+        try:
+            message = messages.get(timeout=1)
+        except queue.Empty:
+            for index in list(pending):
+                if not processes[index].is_alive():
+                    failures[index] = f"Session process exited with code {processes[index].exitcode} without reporting"
+                    pending.discard(index)
+                    waiting_for_ready.discard(index)
+            continue
+
+        kind, index = message[:2]
+        waiting_for_ready.discard(index)
+        if kind == 'done':
+            results.extend(message[2])
+            pool_fallbacks += message[3]
+            pending.discard(index)
+        elif kind == 'failed':
+            failures[index] = message[2]
+            pending.discard(index)
+
+    wall_seconds = time.perf_counter() - start_time if start_time is not None else 0.0
+    for process in processes:
+        process.join()
+    return results, pool_fallbacks, failures, wall_seconds
+
+
+def print_report(results, sampler, wall_seconds, pool_fallbacks, failures):
+    by_interaction = defaultdict(list)
+    calls_by_interaction = defaultdict(Counter)
+    errors = Counter()
+    for interaction, seconds, calls, error in results:
+        by_interaction[interaction].append(seconds)
+        calls_by_interaction[interaction].update(calls)
+        if error:
+            errors[(interaction, str(error)[:120])] += 1
+
+    print(f"\n{len(results)} interactions in {wall_seconds:.1f} s ({len(results) / max(wall_seconds, 1e-9):.1f}/s)\n")
+    print(f"{'interaction':<12}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}   AWS calls per interaction")
+    for interaction in ('open',) + INTERACTIONS:
+        latencies = sorted(by_interaction.get(interaction, []))
+        if not latencies:
+            continue
+        calls = ", ".join(
+            f"{method} {count / len(latencies):.1f}" for method, count in sorted(calls_by_interaction[interaction].items())
+        ) or "none"
+        print(f"{interaction:<12}{len(latencies):>7}"
+              f"{percentile(latencies, 50) * 1000:>10.1f}{percentile(latencies, 90) * 1000:>10.1f}"
+              f"{percentile(latencies, 99) * 1000:>10.1f}{latencies[-1] * 1000:>10.1f}   {calls}")
+
+    if sampler.samples:
+        print(f"\n{'time s':>8}{'CPU %':>9}{'RSS MB':>10}{'procs':>7}")
+        step = max(1, len(sampler.samples) // 20) # Keep the printed series short
+        for elapsed, cpu_percent, rss, count in sampler.samples[::step]:
+            print(f"{elapsed:>8.1f}{cpu_percent:>9.0f}{rss / 1024 / 1024:>10.1f}{count:>7}")
+        print(f"Peak RSS: {max(s[2] for s in sampler.samples) / 1024 / 1024:.1f} MB, "
+              f"mean CPU: {sum(s[1] for s in sampler.samples) / len(sampler.samples):.0f}%")
+
+    upload_batches = len(by_interaction.get('upload', []))
+    print(f"\nImage pool fallbacks: {pool_fallbacks} of {upload_batches} upload batches optimized in-process")
+
+    if errors or failures:
+        print("\nErrors:")
+        for (interaction, error), count in errors.most_common():
+            print(f"  {interaction}: {count}x {error}")
+        for index, failure in sorted(failures.items()):
+            print(f"  session {index} failed:\n    " + failure.strip().replace("\n", "\n    "))
+
+
+def write_samples_csv(path, sampler):
+    with open(path, 'w') as f:
+        f.write("seconds,cpu_percent,rss_bytes,processes\n")
+        for elapsed, cpu_percent, rss, count in sampler.samples:
+            f.write(f"{elapsed:.3f},{cpu_percent:.1f},{rss},{count}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the photo app.")
+    parser.add_argument('--sessions', type=int, default=8, help="Number of concurrent sessions")
+    parser.add_argument('--interactions', type=int, default=25, help="Interactions per session")
+    parser.add_argument('--photos', type=int, default=200, help="Photos seeded before the run")
+    parser.add_argument('--weights', type=int, nargs=4, default=DEFAULT_WEIGHTS, metavar=('BROWSE', 'TOGGLE', 'ZIP', 'UPLOAD'))
+    parser.add_argument('--zip-size', type=int, default=5, help="Photos selected per zip interaction")
+    parser.add_argument('--upload-batch', type=int, default=3, help="Images per upload interaction")
+    parser.add_argument('--think-time', type=float, default=0.0, help="Max random pause between interactions (s)")
+    parser.add_argument('--sample-interval', type=float, default=0.5, help="CPU/RSS sampling interval (s)")
+    parser.add_argument('--samples-csv', help="Write the full CPU/RSS time series to this CSV file")
+    parser.add_argument('--timeout', type=float, default=60, help="Per-rerun AppTest timeout (s)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    # Session processes are spawned so they don't inherit the harness's threads and locks
+    context = multiprocessing.get_context('spawn')
+    manager = context.Manager()
+    backend = (manager.dict(), manager.Lock(), manager.dict(), manager.Lock())
+    s3_objects, s3_lock, table_items, table_lock = backend
+    seed_photos(LocalS3Client(s3_objects, s3_lock), LocalDynamoDBTable(items=table_items, lock=table_lock),
+                args.photos, random.Random(args.seed))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = os.path.join(tmp_dir, 'gallery_snapshot.bin')
+        messages = context.Queue()
+        start = context.Event()
+        processes = [
+            context.Process(target=run_session_process, args=(i, args, backend, snapshot_path, messages, start))
+            for i in range(args.sessions)
+        ]
+        sampler = ResourceSampler(args.sample_interval)
+        sampler.start()
+        results, pool_fallbacks, failures, wall_seconds = run_sessions(processes, messages, start)
+        sampler.stop()
+    manager.shutdown()
+
+    print_report(results, sampler, wall_seconds, pool_fallbacks, failures)
+    if args.samples_csv:
+        write_samples_csv(args.samples_csv, sampler)
+        print(f"\nCPU/RSS samples written to {args.samples_csv}")
+
+
+if __name__ == '__main__':
+    main()
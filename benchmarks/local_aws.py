@@ -0,0 +1,182 @@
+# my_photo_app/benchmarks/local_aws.py
+#
+# In-memory stand-ins for the S3 client and DynamoDB Table used by aws_utils.py, for load testing without AWS.
+# They implement only the calls the app makes and count every call, so the harness can report
+# AWS calls per interaction. Each session gets its own client object (for_session) sharing the same data.
+
+import io
+import operator
+import re
+import threading
+from collections import Counter
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+
+class CallCounter:
+    """Thread-safe count of calls per API method."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, method):
+        with self._lock:
+            self._counts[method] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self._counts)
+
+
+def _client_error(code, message, operation_name):
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation_name)
+
+
+class LocalS3Client:
+    """Minimal stand-in for a boto3 S3 client (put_object / get_object)."""
+
+    def __init__(self, objects=None, lock=None):
+        self._objects = objects if objects is not None else {}
+        self._lock = lock or threading.Lock()
+        self.calls = CallCounter()
+
+    def for_session(self):
+        """Returns a client sharing this one's objects but with its own call counter."""
+        return LocalS3Client(self._objects, self._lock)
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.calls.record('put_object')
+        with self._lock:
+            self._objects[(Bucket, Key)] = (bytes(Body), ContentType)
+        return {}
+
+    def get_object(self, Bucket, Key):
+        self.calls.record('get_object')
+        with self._lock:
+            stored = self._objects.get((Bucket, Key))
+        if stored is None:
+            raise _client_error('NoSuchKey', 'The specified key does not exist.', 'GetObject')
+        body, content_type = stored
+        return {'Body': io.BytesIO(body), 'ContentType': content_type, 'ContentLength': len(body)}
+
+
+_COMPARISONS = {
+    '=': operator.eq,
+    '<>': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def _matches(condition, item):
+    """Evaluates a boto3.dynamodb.conditions condition against an item."""
+    expression = condition.get_expression()
+    op = expression['operator']
+    values = expression['values']
+    if op == 'AND':
+        return all(_matches(value, item) for value in values)
+    if op == 'OR':
+        return any(_matches(value, item) for value in values)
+    if op == 'NOT':
+        return not _matches(values[0], item)
+
+    name = values[0].name
+    if op == 'attribute_exists':
+        return name in item
+    if op == 'attribute_not_exists':
+        return name not in item
+    if name not in item:
+        return False
+    if op == 'BETWEEN':
+        return values[1] <= item[name] <= values[2]
+    if op == 'begins_with':
+        return str(item[name]).startswith(values[1])
+    return _COMPARISONS[op](item[name], values[1])
+
+
+def _to_dynamodb_value(value):
+    """Numbers come back from DynamoDB as Decimal, so store them that way."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    return value
+
+
+class LocalDynamoDBTable:
+    """
+    Minimal stand-in for a boto3 DynamoDB Table resource with a (user_id, photo_id) primary key.
+    `indexes` maps index name -> (partition key, sort key); items missing the sort key are left out (sparse index).
+    Pagination is not simulated: every scan/query returns all matches in one page.
+    """
+
+    table_status = 'ACTIVE'
+
+    def __init__(self, indexes=None, items=None, lock=None):
+        self._indexes = indexes if indexes is not None else {'UpdatedTimestampIndex': ('user_id', 'updated_timestamp')}
+        self._items = items if items is not None else {}
+        self._lock = lock or threading.Lock()
+        self.calls = CallCounter()
+
+    def for_session(self):
+        """Returns a table sharing this one's items but with its own call counter."""
+        return LocalDynamoDBTable(self._indexes, self._items, self._lock)
+
+    def put_item(self, Item):
+        self.calls.record('put_item')
+        item = {name: _to_dynamodb_value(value) for name, value in Item.items()}
+        with self._lock:
+            self._items[(item['user_id'], item['photo_id'])] = item
+        return {}
+
+    def scan(self, **kwargs):
+        self.calls.record('scan')
+        with self._lock:
+            items = [dict(item) for item in self._items.values()]
+        if 'FilterExpression' in kwargs:
+            items = [item for item in items if _matches(kwargs['FilterExpression'], item)]
+        return {'Items': items, 'Count': len(items)}
+
+    def query(self, KeyConditionExpression, IndexName=None, FilterExpression=None, **kwargs):
+        self.calls.record('query')
+        if IndexName is None:
+            sort_key = 'photo_id'
+        elif IndexName in self._indexes:
+            sort_key = self._indexes[IndexName][1]
+        else:
+            raise _client_error('ValidationException', f"The table does not have the specified index: {IndexName}", 'Query')
+
+        with self._lock:
+            items = [dict(item) for item in self._items.values() if sort_key in item]
+        items = [item for item in items if _matches(KeyConditionExpression, item)]
+        items.sort(key=lambda item: item[sort_key], reverse=not kwargs.get('ScanIndexForward', True))
+        if FilterExpression is not None:
+            items = [item for item in items if _matches(FilterExpression, item)]
+        return {'Items': items, 'Count': len(items)}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, ConditionExpression=None):
+        """Supports 'SET a = :x, b = :y' and 'ADD c :n' clauses, which is all aws_utils.py uses."""
+        self.calls.record('update_item')
+        key = (Key['user_id'], Key['photo_id'])
+        with self._lock:
+            item = dict(self._items.get(key, Key))
+            if ConditionExpression is not None and not _matches(ConditionExpression, self._items.get(key, {})):
+                raise _client_error('ConditionalCheckFailedException', 'The conditional request failed', 'UpdateItem')
+
+            clauses = re.split(r'\b(SET|ADD|REMOVE)\b', UpdateExpression)
+            for action, body in zip(clauses[1::2], clauses[2::2]):
+                for part in (p.strip() for p in body.split(',') if p.strip()):
+                    if action == 'SET':
+                        name, placeholder = (s.strip() for s in part.split('='))
+                        item[name] = _to_dynamodb_value(ExpressionAttributeValues[placeholder])
+                    elif action == 'ADD':
+                        name, placeholder = part.split()
+                        item[name] = item.get(name, Decimal(0)) + _to_dynamodb_value(ExpressionAttributeValues[placeholder])
+                    else:
+                        item.pop(part, None)
+            self._items[key] = item
+        return {}
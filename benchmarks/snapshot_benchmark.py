@@ -0,0 +1,122 @@
+# my_photo_app/benchmarks/snapshot_benchmark.py
+#
+# Compares warm-start cost of the gallery metadata:
+#   dicts             - today's representation: a list of boto3-style dicts with Decimal numbers
+#                       (the DynamoDB scan itself is not included, so this is a lower bound)
+#   snapshot_open     - memory-mapping the binary snapshot (what a restart now pays before serving)
+#   view_iterate      - one pass over a session's GalleryView on the snapshot (what each gallery rerun decodes;
+#                       the dicts are freed as it goes, so the RSS delta is what stays resident afterwards)
+#   session_view      - memory a session holds: a GalleryView over the shared snapshot (averaged over 10 sessions)
+#
+# Each scenario runs in a fresh interpreter so resident memory is measured in isolation.
+# Usage: python benchmarks/snapshot_benchmark.py [--items 100000]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+# Ensure project root is in sys.path (same as app.py)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from my_photo_app.gallery_sync import GalleryView
+from my_photo_app.metadata_snapshot import PhotoSnapshot, write_snapshot
+
+BUCKET_URL = "https://my-family-photos-app-s3.s3.eu-west-1.amazonaws.com"
+
+
+def make_items(count):
+    """Builds `count` items shaped like the boto3 scan output for FamilyPhotoMetadata."""
+    base = 1700000000000
+    items = []
+    for i in range(count):
+        t = base + (count - i) * 1000
+        key = f"{i:08x}-1b4e-4c1e-9c7e-2f8a9d1e{i:04x}.jpg"
+        items.append({
+            'user_id': 'anonymous_family_uploads',
+            'photo_id': f"{i:08x}-7a3c-4b2d-8e1f-5c6d7e8f{i:04x}{t}",
+            's3_key': key,
+            's3_url': f"{BUCKET_URL}/{key}",
+            'description': f"Family trip day {i % 365}",
+            'original_filename': f"IMG_{i:05d}.jpg",
+            'uploader': 'anonymous',
+            'upload_timestamp': Decimal(t),
+            'updated_timestamp': Decimal(t),
+            'version': Decimal(1),
+        })
+    return items
+
+
+def rss_bytes():
+    """Current resident set size of this process."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # Peak, on platforms without /proc
+
+
+def run_scenario(name, count, snapshot_path):
+    """Runs one scenario in this process and returns its measurements."""
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    if name == 'dicts':
+        data = make_items(count)
+    elif name == 'snapshot_open':
+        data = PhotoSnapshot(snapshot_path)
+    elif name == 'view_iterate':
+        data = PhotoSnapshot(snapshot_path)
+        count = sum(1 for _ in GalleryView(data))
+        assert count == len(data)
+    elif name == 'session_view':
+        shared = PhotoSnapshot(snapshot_path)
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        sessions = [GalleryView(shared) for _ in range(10)]
+        elapsed = (time.perf_counter() - start) / len(sessions)
+        rss_after = rss_bytes()
+        return {'scenario': name, 'items': len(shared), 'seconds': elapsed, 'rss_delta_bytes': (rss_after - rss_before) / len(sessions)}
+    else:
+        raise ValueError(f"Unknown scenario: {name}")
+    elapsed = time.perf_counter() - start
+    rss_after = rss_bytes()
+    return {'scenario': name, 'items': len(data), 'seconds': elapsed, 'rss_delta_bytes': rss_after - rss_before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gallery metadata warm start.")
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    parser.add_argument('--snapshot', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args.scenario, args.items, args.snapshot)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = os.path.join(tmp_dir, 'gallery_snapshot.bin')
+        write_snapshot(snapshot_path, make_items(args.items), 0)
+        print(f"Snapshot file for {args.items} items: {os.path.getsize(snapshot_path) / 1024 / 1024:.1f} MB")
+        print(f"{'scenario':<16}{'time':>12}{'RSS delta':>14}")
+        for name in ('dicts', 'snapshot_open', 'view_iterate', 'session_view'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--items', str(args.items), '--scenario', name, '--snapshot', snapshot_path],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output)
+            print(f"{name:<16}{result['seconds'] * 1000:>9.1f} ms{result['rss_delta_bytes'] / 1024 / 1024:>11.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
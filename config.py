@@ -5,7 +5,36 @@ S3_BUCKET_NAME = "my-family-photos-app-s3" # <<< REPLACE WITH YOUR S3 BUCKET NAM
 
 # --- AWS DynamoDB Configuration ---
 DYNAMODB_TABLE_NAME = "FamilyPhotoMetadata" # <<< REPLACE WITH YOUR DYNAMODB TABLE NAME
+# Global secondary index used for gallery delta sync: partition key 'user_id' (S), sort key 'updated_timestamp' (N),
+# projection ALL. Created on deploy by scripts/create_dynamodb_index.sh (AfterInstall hook in appspec.yml).
+# If it doesn't exist yet (or is still backfilling), the app falls back to a filtered query of the whole partition.
+DYNAMODB_UPDATED_INDEX_NAME = "UpdatedTimestampIndex"
+# After the index turns out to be missing, each app process uses the fallback without trying the index again
+# for this long
+DYNAMODB_INDEX_RETRY_SECONDS = 600
+# Delta syncs re-read this much history before the high-water mark. Timestamps are assigned before the write
+# commits and the index is eventually consistent, so a change can become visible after a newer one was synced.
+DELTA_SYNC_SAFETY_LAG_MS = 5000
 
 # --- AWS Region ---
 # Ensure this matches the region where your S3 bucket and DynamoDB table are created
-AWS_REGION = "eu-west-1" # <<< REPLACE WITH YOUR AWS REGION (e.g., 'us-east-1', 'ap-southeast-2')
\ No newline at end of file
+AWS_REGION = "eu-west-1" # <<< REPLACE WITH YOUR AWS REGION (e.g., 'us-east-1', 'ap-southeast-2')
+
+# --- Upload Optimization ---
+# Strip metadata (orientation and colour profile are kept) and losslessly re-compress uploads before storing in S3.
+# JPEG pixel data is never decoded or re-encoded; PNGs are re-compressed by Pillow.
+OPTIMIZE_UPLOADS = True
+# Set to e.g. "WEBP" or "AVIF" to convert uploads to a modern format. None keeps the uploaded format.
+CONVERT_UPLOADS_TO = None
+CONVERT_QUALITY = 85 # Used for lossy conversions of JPEG sources (PNG -> WEBP is always lossless)
+# When converting, also store the untouched original under originals/ in the S3 bucket
+KEEP_ORIGINAL_UPLOADS = False
+# Number of worker processes for image optimization (None = one per CPU core)
+OPTIMIZE_MAX_WORKERS = None
+
+# --- Gallery Metadata Snapshot ---
+# Compact on-disk copy of the gallery metadata, memory-mapped at startup so the first visitor doesn't wait for a full scan.
+# Kept outside the deployment directory so it survives redeploys.
+METADATA_SNAPSHOT_PATH = "~/.my_photo_app/gallery_snapshot.bin"
+# Re-scan DynamoDB in the background and rewrite the snapshot when it is older than this
+METADATA_SNAPSHOT_MAX_AGE_SECONDS = 3600
\ No newline at end of file
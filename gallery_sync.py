@@ -0,0 +1,217 @@
+# my_photo_app/gallery_sync.py
+
+# Incremental (delta) gallery sync.
+# Each session keeps a GalleryView plus a high-water mark (the newest updated_timestamp it has seen).
+# On rerun only items changed since the high-water mark are fetched and layered onto the view.
+# Views start from the process-wide memory-mapped metadata snapshot instead of a full table scan.
+
+import datetime
+import os
+import threading
+import time
+
+from .aws_utils import create_dynamodb_table, get_photo_changes_since, scan_all_photos
+from .config import METADATA_SNAPSHOT_PATH, METADATA_SNAPSHOT_MAX_AGE_SECONDS, DELTA_SYNC_SAFETY_LAG_MS
+from .metadata_snapshot import load_snapshot, write_snapshot
+
+# Process-wide gallery base (photos, high_water_mark) that new sessions start from, shared by all sessions
+_gallery_base = None
+_gallery_base_loaded_at = 0.0
+_snapshot_lock = threading.Lock()
+_build_lock = threading.Lock() # Single-flight for the synchronous first build
+_reconcile_thread = None
+
+
+def _photo_timestamp(photo):
+    """Sort key for the gallery (upload time, ms since epoch)."""
+    return photo.get('upload_timestamp', 0)
+
+
+def get_high_water_mark(photos):
+    """Returns the newest change timestamp in photos (0 if empty). Older items without updated_timestamp use upload_timestamp."""
+    return max((photo.get('updated_timestamp', photo.get('upload_timestamp', 0)) for photo in photos), default=0)
+
+
+def _insert_sorted(photos, photo):
+    """Inserts photo into a list sorted newest-first, without re-sorting. Ties go after existing items."""
+    timestamp = _photo_timestamp(photo)
+    low, high = 0, len(photos)
+    while low < high:
+        mid = (low + high) // 2
+        if _photo_timestamp(photos[mid]) >= timestamp:
+            low = mid + 1
+        else:
+            high = mid
+    photos.insert(low, photo)
+
+
+class GalleryView:
+    """
+    A session's gallery, newest first: the shared base (memory-mapped snapshot, or a list) plus this session's
+    changes layered on top. The base is never copied; records are decoded while iterating, so a session only
+    holds the photos changed since the base was built.
+    """
+
+    def __init__(self, base=()):
+        self._base = base
+        self._changes = {} # photo_id -> newest change seen (including tombstones)
+        self._added = [] # Non-deleted changes, newest upload first
+
+    def merge(self, changes):
+        """
+        Merges changed items and returns self. New items are shown at their sorted position, edited items replace
+        the older copy and tombstoned items (deleted=True) are hidden. A change older than the copy already held
+        (lower version) is ignored, so re-applying changes is harmless.
+        """
+        for change in changes:
+            held = self._changes.get(change['photo_id'])
+            if held is not None:
+                if change.get('version', 1) < held.get('version', 1):
+                    continue # We already hold a newer copy
+                if not held.get('deleted'):
+                    self._added.pop(next(i for i, photo in enumerate(self._added) if photo is held))
+            self._changes[change['photo_id']] = change
+            if not change.get('deleted'):
+                _insert_sorted(self._added, change)
+        return self
+
+    def __iter__(self):
+        added = self._added
+        changes = self._changes
+        stale = set() # Changes older than the base's copy
+        i = 0
+        for photo in self._base:
+            timestamp = _photo_timestamp(photo)
+            while i < len(added) and _photo_timestamp(added[i]) > timestamp:
+                if added[i]['photo_id'] not in stale:
+                    yield added[i]
+                i += 1
+            change = changes.get(photo['photo_id'])
+            if change is not None:
+                if change.get('version', 1) >= photo.get('version', 1):
+                    continue # Replaced or deleted by this session's copy
+                stale.add(photo['photo_id']) # An edit keeps upload_timestamp, so the stale copy comes after this one
+            yield photo
+        for photo in added[i:]:
+            if photo['photo_id'] not in stale:
+                yield photo
+
+    def __bool__(self):
+        return next(iter(self), None) is not None
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def _snapshot_path():
+    return os.path.expanduser(METADATA_SNAPSHOT_PATH)
+
+
+def _set_gallery_base(photos, high_water_mark, loaded_at):
+    global _gallery_base, _gallery_base_loaded_at
+    with _snapshot_lock:
+        _gallery_base = (photos, high_water_mark) # An old snapshot mapping is released once no session is reading it
+        _gallery_base_loaded_at = loaded_at
+
+
+def reconcile_snapshot(dynamodb_table):
+    """
+    Scans DynamoDB, rewrites the on-disk snapshot and makes it the base for new sessions.
+    If the snapshot can't be written or read back, the scanned photos themselves become the base,
+    so the scan is never wasted. Returns the new base (photos, high_water_mark), or None if the scan failed.
+    """
+    # Anything written while the scan runs may be missed by it, so the high-water mark
+    # never goes past the scan start; later delta syncs re-read that window.
+    scan_started = int(datetime.datetime.now().timestamp() * 1000)
+    try:
+        items = scan_all_photos(dynamodb_table)
+    except Exception as e:
+        print(f"Gallery Sync WARNING: Could not scan DynamoDB to refresh the gallery snapshot. Error: {e}")
+        return None
+    photos = [item for item in items if not item.get('deleted')]
+    photos.sort(key=lambda x: x.get('upload_timestamp', 0), reverse=True)
+    high_water_mark = min(get_high_water_mark(items), scan_started)
+
+    snapshot = None
+    try:
+        write_snapshot(_snapshot_path(), photos, high_water_mark)
+        snapshot = load_snapshot(_snapshot_path())
+    except Exception as e:
+        print(f"Gallery Sync WARNING: Could not write gallery snapshot, keeping it in memory only. Error: {e}")
+
+    if snapshot is not None:
+        photos = snapshot # Serve from the mapping; the scanned dicts are freed
+    _set_gallery_base(photos, high_water_mark, time.time())
+    print(f"Gallery Sync: Gallery base refreshed with {len(photos)} photos.")
+    return photos, high_water_mark
+
+
+def _reconcile_in_background():
+    # The session that triggered this keeps using its own table on the script thread,
+    # and boto3 resources are not thread-safe, so this thread gets a fresh one.
+    try:
+        dynamodb_table = create_dynamodb_table()
+    except Exception as e:
+        print(f"Gallery Sync WARNING: Could not create a DynamoDB table for background reconcile. Error: {e}")
+        return
+    reconcile_snapshot(dynamodb_table)
+
+
+def _start_background_reconcile():
+    """Starts reconcile_snapshot on a daemon thread unless one is already running. Caller holds _snapshot_lock."""
+    global _reconcile_thread
+    if _reconcile_thread is not None and _reconcile_thread.is_alive():
+        return
+    _reconcile_thread = threading.Thread(target=_reconcile_in_background, daemon=True)
+    _reconcile_thread.start()
+
+
+def get_gallery_base(dynamodb_table):
+    """
+    Returns the process-wide (photos, high_water_mark) that new sessions start from, or None if it can't be built.
+    A snapshot left over from before a restart is memory-mapped and served immediately, then reconciled with
+    DynamoDB in the background. With no snapshot on disk the base is built synchronously, by one session only;
+    concurrent first sessions wait for it instead of scanning too.
+    """
+    global _gallery_base, _gallery_base_loaded_at
+    with _snapshot_lock:
+        if _gallery_base is None:
+            snapshot = load_snapshot(_snapshot_path())
+            if snapshot is not None:
+                _gallery_base = (snapshot, snapshot.high_water_mark)
+                _gallery_base_loaded_at = 0.0 # Unknown freshness, so reconcile right away
+        base = _gallery_base
+        if base is not None and time.time() - _gallery_base_loaded_at > METADATA_SNAPSHOT_MAX_AGE_SECONDS:
+            _start_background_reconcile()
+    if base is not None:
+        return base
+
+    with _build_lock:
+        if _gallery_base is not None:
+            return _gallery_base # Built by another session while we waited
+        return reconcile_snapshot(dynamodb_table)
+
+
+def sync_gallery(dynamodb_table, state):
+    """
+    Returns the session's up-to-date GalleryView (iterates photos newest first).
+    `state` is a dict-like store (st.session_state) holding 'gallery_photos' and 'gallery_high_water_mark'.
+    The first call starts from the shared gallery base (snapshot); every call then fetches only changes
+    since the high-water mark.
+    """
+    if state.get('gallery_photos') is None:
+        base = get_gallery_base(dynamodb_table)
+        if base is None:
+            return [] # DynamoDB unreachable; the next rerun tries again
+        photos, high_water_mark = base
+        state['gallery_photos'] = GalleryView(photos)
+        state['gallery_high_water_mark'] = high_water_mark
+
+    photos = state['gallery_photos']
+    # Re-read a window before the mark: merging is idempotent, and late-visible writes are not missed
+    since = max(0, state.get('gallery_high_water_mark', 0) - DELTA_SYNC_SAFETY_LAG_MS)
+    changes = get_photo_changes_since(dynamodb_table, since)
+    if changes:
+        photos.merge(changes)
+        state['gallery_high_water_mark'] = max(state.get('gallery_high_water_mark', 0), get_high_water_mark(changes))
+    return photos
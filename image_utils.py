@@ -0,0 +1,329 @@
+# my_photo_app/image_utils.py
+
+import contextlib
+import io
+import multiprocessing
+import struct
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+# EXIF tag id for Orientation. This is the only EXIF field we keep when stripping metadata.
+EXIF_ORIENTATION_TAG = 0x0112
+
+# Formats we know how to re-encode losslessly. Anything else (e.g. GIF) is stored as uploaded.
+OPTIMIZABLE_FORMATS = ("JPEG", "PNG")
+
+# Pillow modes that hold 16-bit PNG samples without truncating them (16-bit grayscale)
+PNG_16_BIT_MODES = ("I", "I;16", "I;16B", "I;16L")
+
+CONTENT_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "GIF": "image/gif",
+    "WEBP": "image/webp",
+    "AVIF": "image/avif",
+}
+
+EXTENSIONS = {
+    "JPEG": "jpg",
+    "PNG": "png",
+    "GIF": "gif",
+    "WEBP": "webp",
+    "AVIF": "avif",
+}
+
+# Process pool is created lazily and shared across uploads (Pillow encoding holds the GIL).
+# Sessions run on separate script threads, so the pool globals are only touched under the lock.
+_process_pool = None
+_process_pool_workers = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(max_workers=None):
+    """
+    Returns the shared process pool used for image optimization, (re)creating it when max_workers changes.
+    Caller holds _process_pool_lock.
+    """
+    global _process_pool, _process_pool_workers
+    if _process_pool is not None and _process_pool_workers != max_workers:
+        _discard_process_pool()
+    if _process_pool is None:
+        # Forking from Streamlit's multithreaded server can copy held locks into the workers and deadlock them
+        _process_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("forkserver"))
+        _process_pool_workers = max_workers
+    return _process_pool
+
+
+def _discard_process_pool(wait=False):
+    """Drops the shared pool so the next batch starts a fresh one. Caller holds _process_pool_lock."""
+    global _process_pool, _process_pool_workers
+    if _process_pool is not None:
+        # Batches already submitted by other sessions still finish; a broken pool fails them on its own
+        _process_pool.shutdown(wait=wait)
+        _process_pool = None
+        _process_pool_workers = None
+
+
+def _reset_process_pool(pool=None, wait=False):
+    """
+    Discards the shared pool if it is still `pool` (any pool if None), e.g. after it broke.
+    With wait=True, blocks until its workers have exited.
+    """
+    with _process_pool_lock:
+        if pool is None or pool is _process_pool:
+            _discard_process_pool(wait)
+
+
+@contextlib.contextmanager
+def _hidden_main():
+    """
+    Hides the real __main__ module while pool workers start. Under Streamlit, __main__ is the app script, and
+    forkserver/spawn workers re-import the parent's __main__ from its path, so they would re-run app.py.
+    Workers are started on submit(), so this wraps both pool creation and submitting.
+    """
+    real_main = sys.modules.get("__main__")
+    stub = types.ModuleType("__main__") # No __file__, so multiprocessing has nothing to re-import
+    sys.modules["__main__"] = stub
+    try:
+        yield
+    finally:
+        if sys.modules.get("__main__") is stub:
+            sys.modules["__main__"] = real_main
+
+
+def _minimal_exif(image):
+    """Builds EXIF bytes holding only the Orientation tag, or None if the image has none."""
+    orientation = image.getexif().get(EXIF_ORIENTATION_TAG)
+    if not orientation:
+        return None
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION_TAG] = orientation
+    return exif.tobytes()
+
+
+def _keep_jpeg_segment(marker, payload):
+    """Decides whether a JPEG marker segment survives metadata stripping."""
+    if marker == 0xFE:
+        return False # COM
+    if not 0xE0 <= marker <= 0xEF:
+        return True # Not metadata (tables, frame/scan headers, ...)
+    if marker == 0xE0 or marker == 0xEE:
+        return True # APP0 (JFIF) and APP14 (Adobe colour transform) affect how pixels are decoded
+    return marker == 0xE2 and payload.startswith(b"ICC_PROFILE\x00") # Needed for correct colours
+
+
+def _strip_jpeg_metadata(data, exif):
+    """
+    Rewrites a JPEG at the marker level: drops APPn/COM metadata segments and inserts `exif`
+    (Orientation-only EXIF bytes, or None) as the APP1 segment. Pixel data is copied byte for byte,
+    so this is lossless. Files with data after the end-of-image marker (multi-picture/motion photos)
+    are returned unchanged.
+    """
+    if data[:2] != b"\xff\xd8":
+        raise ValueError("Not a JPEG (missing SOI marker)")
+
+    out = bytearray(b"\xff\xd8")
+    exif_segment = b"\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif if exif else b""
+    pos = 2
+    while True:
+        if data[pos] != 0xFF:
+            raise ValueError(f"Corrupt JPEG: expected a marker at offset {pos}")
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1 # Fill byte
+            continue
+        if marker == 0xD9: # EOI
+            if data[pos + 2:].strip(b"\x00"):
+                return data
+            out += b"\xff\xd9"
+            return bytes(out)
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            out += data[pos:pos + 2] # Standalone markers have no length field
+            pos += 2
+            continue
+
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        end = pos + 2 + length
+        if exif_segment and marker != 0xE0:
+            out += exif_segment # Goes right after APP0, before everything else
+            exif_segment = b""
+        if _keep_jpeg_segment(marker, data[pos + 4:end]):
+            out += data[pos:end]
+        pos = end
+
+        if marker == 0xDA: # SOS: entropy-coded data runs until the next real marker
+            scan_end = pos
+            while True:
+                scan_end = data.index(b"\xff", scan_end)
+                next_byte = data[scan_end + 1]
+                if next_byte == 0x00 or 0xD0 <= next_byte <= 0xD7 or next_byte == 0xFF:
+                    scan_end += 1 # Stuffed byte, restart marker or fill byte
+                    continue
+                break
+            out += data[pos:scan_end]
+            pos = scan_end
+
+
+def _reencode(image, image_format, data):
+    """
+    Rewrites an image in its own format with metadata stripped (orientation and ICC profile kept), losslessly.
+    JPEGs are stripped at the marker level without decoding; PNGs are re-compressed by Pillow.
+    Returns the original data for PNGs Pillow can't round-trip exactly (16-bit colour).
+    """
+    exif = _minimal_exif(image)
+    if image_format == "JPEG":
+        return _strip_jpeg_metadata(data, exif)
+
+    # IHDR bit depth: 8-byte signature, chunk length and type, width and height come first
+    if data[24] == 16 and image.mode not in PNG_16_BIT_MODES:
+        return data # Pillow opens 16-bit colour PNGs as 8-bit, so re-saving would lose precision
+
+    buffer = io.BytesIO()
+    params = {"optimize": True, "compress_level": 9}
+    icc_profile = image.info.get("icc_profile")
+    if icc_profile:
+        params["icc_profile"] = icc_profile # Needed for correct colours, so not "unneeded" metadata
+    if exif:
+        params["exif"] = exif
+    image.save(buffer, format=image_format, **params)
+    return buffer.getvalue()
+
+
+def _convert(image, target_format, quality):
+    """
+    Converts an image to target_format. Orientation is applied to the pixels since EXIF support varies by format.
+    Returns None for multi-frame images, which are not converted.
+    """
+    if getattr(image, "n_frames", 1) > 1:
+        return None
+    buffer = io.BytesIO()
+    was_png = image.format == "PNG"
+    image = ImageOps.exif_transpose(image)
+    params = {"quality": quality}
+    if was_png and target_format == "WEBP":
+        params = {"lossless": True} # Keep screenshots/graphics pixel-exact
+    icc_profile = image.info.get("icc_profile")
+    if icc_profile:
+        params["icc_profile"] = icc_profile
+    image.save(buffer, format=target_format, **params)
+    return buffer.getvalue()
+
+
+def optimize_image_bytes(data, filename, convert_to=None, keep_original=False, convert_quality=85):
+    """
+    Optimizes a single uploaded image and returns a result dict:
+    'data', 'content_type', 'extension', 'original_size', 'optimized_size', 'bytes_saved',
+    and 'original' (the untouched bytes when keep_original is set and the stored bytes differ, else None).
+
+    Falls back to the original bytes whenever optimization fails or would make the file bigger.
+    This is a module-level function so it can be run in a worker process.
+    """
+    original_extension = filename.split('.')[-1].lower() if '.' in filename else ""
+    result = {
+        "filename": filename,
+        "data": data,
+        "content_type": None,
+        "extension": original_extension,
+        "original_size": len(data),
+        "optimized_size": len(data),
+        "bytes_saved": 0,
+        "original": None,
+    }
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image_format = image.format
+        result["content_type"] = CONTENT_TYPES.get(image_format)
+
+        if image_format not in OPTIMIZABLE_FORMATS:
+            return result # e.g. animated GIFs are stored exactly as uploaded
+        if getattr(image, "is_animated", False):
+            return result # Animated PNGs (APNG) would be saved as their first frame only
+
+        target_format = convert_to.upper() if convert_to else image_format
+        if target_format == "JPG":
+            target_format = "JPEG"
+
+        if target_format == image_format:
+            new_data = _reencode(image, image_format, data)
+        else:
+            new_data = _convert(image, target_format, convert_quality)
+            if new_data is None:
+                return result
+
+        # Only accept a re-encode of the same format if it actually saves space.
+        # Conversions are always accepted since the caller asked for the new format.
+        if target_format == image_format and len(new_data) >= len(data):
+            return result
+
+        result["data"] = new_data
+        result["content_type"] = CONTENT_TYPES.get(target_format, result["content_type"])
+        result["extension"] = EXTENSIONS.get(target_format, target_format.lower())
+        result["optimized_size"] = len(new_data)
+        result["bytes_saved"] = len(data) - len(new_data)
+        if keep_original and target_format != image_format:
+            result["original"] = data
+        return result
+    except Exception as e:
+        print(f"Image Utils WARNING: Could not optimize '{filename}', storing original. Error: {e}")
+        return result
+
+
+def optimize_uploads(files, convert_to=None, keep_original=False, convert_quality=85, max_workers=None):
+    """
+    Optimizes a batch of (filename, bytes) pairs on the process pool.
+    Returns (results, batch_summary) where results are in input order and
+    batch_summary has 'original_size', 'optimized_size' and 'bytes_saved' totals,
+    plus 'pool_fallback' (True if the pool failed and the batch was optimized in-process).
+    """
+    files = list(files)
+    if not files:
+        return [], {"original_size": 0, "optimized_size": 0, "bytes_saved": 0, "pool_fallback": False}
+
+    pool_fallback = False
+    if len(files) == 1:
+        # Not worth a trip through the pool for a single image
+        filename, data = files[0]
+        results = [optimize_image_bytes(data, filename, convert_to, keep_original, convert_quality)]
+    else:
+        pool = None
+        try:
+            with _process_pool_lock, _hidden_main():
+                pool = _get_process_pool(max_workers)
+                futures = [
+                    pool.submit(optimize_image_bytes, data, filename, convert_to, keep_original, convert_quality)
+                    for filename, data in files
+                ]
+            results = [future.result() for future in futures]
+        except Exception as e:
+            # A broken pool (e.g. a worker was killed) should not block uploads
+            print(f"Image Utils WARNING: Process pool failed, optimizing in-process instead. Error: {e}")
+            if pool is not None:
+                _reset_process_pool(pool) # Not a replacement another session already made
+            pool_fallback = True
+            results = [
+                optimize_image_bytes(data, filename, convert_to, keep_original, convert_quality)
+                for filename, data in files
+            ]
+
+    summary = {
+        "original_size": sum(r["original_size"] for r in results),
+        "optimized_size": sum(r["optimized_size"] for r in results),
+    }
+    summary["bytes_saved"] = summary["original_size"] - summary["optimized_size"]
+    summary["pool_fallback"] = pool_fallback
+    return results, summary
+
+
+def format_bytes(num_bytes):
+    """Formats a byte count for display, e.g. 1536 -> '1.5 KB'."""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
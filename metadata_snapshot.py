@@ -0,0 +1,125 @@
+# my_photo_app/metadata_snapshot.py
+
+# Compact binary snapshot of gallery metadata.
+#
+# Layout (little-endian):
+#   header   : magic (8s) | format version (I) | record count (I) | high-water mark (q)
+#   records  : `count` fixed-width records, newest upload first
+#              upload_timestamp (q) | updated_timestamp (q) | version (I) | (offset, length) (II) per string field
+#   strings  : UTF-8 string table the records point into
+#
+# The file is memory-mapped read-only, so opening it costs almost nothing and pages are only
+# read from disk when a record is accessed. Records are decoded into plain dicts on access and
+# are not kept, so the snapshot is never held in memory as Python objects.
+
+import mmap
+import os
+import struct
+import tempfile
+
+SNAPSHOT_MAGIC = b"PHSNAP01"
+SNAPSHOT_FORMAT_VERSION = 1
+
+STRING_FIELDS = ('photo_id', 's3_key', 's3_url', 'description', 'original_filename')
+
+HEADER = struct.Struct('<8sIIq')
+RECORD = struct.Struct('<qqI' + 'II' * len(STRING_FIELDS))
+
+
+class PhotoSnapshot:
+    """Read-only, memory-mapped view of a snapshot file. Behaves like a list of photo metadata dicts."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, count, high_water_mark = HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC or format_version != SNAPSHOT_FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"Not a gallery snapshot (or unsupported version): {path}")
+        self._count = count
+        self._strings_offset = HEADER.size + count * RECORD.size
+        if self._strings_offset > len(self._mmap):
+            self._mmap.close()
+            raise ValueError(f"Truncated gallery snapshot: {path}")
+        self.high_water_mark = high_water_mark
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("snapshot index out of range")
+
+        return self._decode(RECORD.unpack_from(self._mmap, HEADER.size + index * RECORD.size))
+
+    def __iter__(self):
+        records = self._mmap[HEADER.size:self._strings_offset] # One copy of the fixed-width part, freed after iterating
+        for fields in RECORD.iter_unpack(records):
+            yield self._decode(fields)
+
+    def _decode(self, fields):
+        photo = {
+            'upload_timestamp': fields[0],
+            'updated_timestamp': fields[1],
+            'version': fields[2],
+        }
+        mm = self._mmap
+        base = self._strings_offset
+        for i, name in enumerate(STRING_FIELDS):
+            start = base + fields[3 + 2 * i]
+            photo[name] = mm[start:start + fields[4 + 2 * i]].decode('utf-8')
+        return photo
+
+    def close(self):
+        self._mmap.close()
+
+
+def write_snapshot(path, photos, high_water_mark):
+    """
+    Writes photos (already sorted newest-first, tombstones removed) to path.
+    The file is written to a temp file and renamed into place, so readers never see a partial snapshot.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    records = bytearray()
+    strings = bytearray()
+    for photo in photos:
+        string_refs = []
+        for name in STRING_FIELDS:
+            value = photo.get(name)
+            encoded = str(value).encode('utf-8') if value is not None else b''
+            string_refs.extend((len(strings), len(encoded)))
+            strings.extend(encoded)
+        upload_timestamp = int(photo.get('upload_timestamp', 0)) # DynamoDB returns Decimal
+        records.extend(RECORD.pack(
+            upload_timestamp,
+            int(photo.get('updated_timestamp', upload_timestamp)),
+            int(photo.get('version', 1)),
+            *string_refs
+        ))
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(photos), int(high_water_mark)))
+            f.write(records)
+            f.write(strings)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_snapshot(path):
+    """Memory-maps the snapshot at path. Returns None if it is missing or unreadable."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return PhotoSnapshot(path)
+    except Exception as e:
+        print(f"Snapshot WARNING: Could not load gallery snapshot '{path}', ignoring it. Error: {e}")
+        return None
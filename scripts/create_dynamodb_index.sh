@@ -0,0 +1,44 @@
+#!/bin/bash
+# Creates the UpdatedTimestampIndex global secondary index used by gallery delta sync, if it doesn't exist yet.
+# Table, index and region names are read from config.py. The instance role needs dynamodb:DescribeTable and
+# dynamodb:UpdateTable on the table.
+# Failures are reported but don't fail the deployment: without the index the app falls back to a filtered query.
+
+APP_DIR="/home/ec2-user/my_photo_app"
+
+echo "Running create_dynamodb_index.sh as $(whoami)"
+
+cd "$APP_DIR" || { echo "ERROR: Failed to change directory to $APP_DIR. Skipping index creation."; exit 0; }
+
+read -r TABLE_NAME INDEX_NAME REGION < <(python3 -c "import config; print(config.DYNAMODB_TABLE_NAME, config.DYNAMODB_UPDATED_INDEX_NAME, config.AWS_REGION)")
+if [ -z "$REGION" ]; then
+    echo "ERROR: Could not read the table, index and region from config.py. Skipping index creation."
+    exit 0
+fi
+echo "Table: $TABLE_NAME, index: $INDEX_NAME, region: $REGION"
+
+EXISTING_INDEXES=$(aws dynamodb describe-table --table-name "$TABLE_NAME" --region "$REGION" \
+    --query "Table.GlobalSecondaryIndexes[].IndexName" --output text) \
+    || { echo "ERROR: Could not describe table $TABLE_NAME. Skipping index creation."; exit 0; }
+if echo "$EXISTING_INDEXES" | tr '\t' '\n' | grep -qx "$INDEX_NAME"; then
+    echo "Index $INDEX_NAME already exists."
+    exit 0
+fi
+
+# Provisioned tables need throughput for the new index; on-demand tables must not specify any
+BILLING_MODE=$(aws dynamodb describe-table --table-name "$TABLE_NAME" --region "$REGION" \
+    --query "Table.BillingModeSummary.BillingMode" --output text)
+THROUGHPUT=""
+if [ "$BILLING_MODE" != "PAY_PER_REQUEST" ]; then
+    THROUGHPUT=',"ProvisionedThroughput":{"ReadCapacityUnits":5,"WriteCapacityUnits":5}'
+fi
+
+echo "Creating index $INDEX_NAME (billing mode: $BILLING_MODE)..."
+aws dynamodb update-table --table-name "$TABLE_NAME" --region "$REGION" \
+    --attribute-definitions AttributeName=user_id,AttributeType=S AttributeName=updated_timestamp,AttributeType=N \
+    --global-secondary-index-updates "[{\"Create\":{\"IndexName\":\"$INDEX_NAME\",\"KeySchema\":[{\"AttributeName\":\"user_id\",\"KeyType\":\"HASH\"},{\"AttributeName\":\"updated_timestamp\",\"KeyType\":\"RANGE\"}],\"Projection\":{\"ProjectionType\":\"ALL\"}$THROUGHPUT}}]" \
+    > /dev/null \
+    || { echo "ERROR: Could not create index $INDEX_NAME. The app will use a filtered query until it exists."; exit 0; }
+
+# Backfilling runs in the background; the app keeps using the filtered query until the index is ACTIVE
+echo "Index $INDEX_NAME is being created."
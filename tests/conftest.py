@@ -0,0 +1,9 @@
+# my_photo_app/tests/conftest.py
+
+import os
+import sys
+
+# Ensure project root is in sys.path so tests can import my_photo_app (same as app.py)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
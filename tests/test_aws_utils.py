@@ -0,0 +1,37 @@
+# my_photo_app/tests/test_aws_utils.py
+
+from my_photo_app import aws_utils
+from my_photo_app.aws_utils import GALLERY_USER_ID, get_photo_changes_since
+from my_photo_app.benchmarks.local_aws import LocalDynamoDBTable
+
+
+def make_table(indexes=None):
+    table = LocalDynamoDBTable(indexes=indexes)
+    for photo_id, updated in (('a', 1000), ('b', 3000), ('c', 2000)):
+        table.put_item(Item={'user_id': GALLERY_USER_ID, 'photo_id': photo_id, 'upload_timestamp': updated, 'updated_timestamp': updated})
+    return table
+
+
+def test_changes_use_the_index(monkeypatch):
+    monkeypatch.setattr(aws_utils, '_updated_index_missing_at', 0.0)
+    table = make_table()
+
+    assert [p['photo_id'] for p in get_photo_changes_since(table, 2000)] == ['c', 'b']
+    assert table.calls.snapshot()['query'] == 1
+
+
+def test_missing_index_is_remembered(monkeypatch):
+    monkeypatch.setattr(aws_utils, '_updated_index_missing_at', 0.0)
+    table = make_table(indexes={})
+
+    # First sync: the index query fails, then the filtered query runs
+    assert [p['photo_id'] for p in get_photo_changes_since(table, 2000)] == ['c', 'b']
+    assert table.calls.snapshot()['query'] == 2
+    # Later syncs go straight to the filtered query
+    assert [p['photo_id'] for p in get_photo_changes_since(table, 3000)] == ['b']
+    assert table.calls.snapshot()['query'] == 3
+
+    # Once the retry interval has passed, the index is tried again
+    monkeypatch.setattr(aws_utils, '_updated_index_missing_at', aws_utils._updated_index_missing_at - aws_utils.DYNAMODB_INDEX_RETRY_SECONDS)
+    get_photo_changes_since(table, 3000)
+    assert table.calls.snapshot()['query'] == 5
@@ -0,0 +1,85 @@
+# my_photo_app/tests/test_gallery_sync.py
+
+from my_photo_app.gallery_sync import GalleryView, get_high_water_mark
+
+
+def photo(photo_id, uploaded, updated=None, version=1, **extra):
+    return dict(photo_id=photo_id, upload_timestamp=uploaded, updated_timestamp=updated or uploaded, version=version, **extra)
+
+
+def ids(view):
+    return [p['photo_id'] for p in view]
+
+
+def test_new_photos_are_inserted_newest_first():
+    view = GalleryView([photo('c', 300), photo('a', 100)])
+    view.merge([photo('d', 400), photo('b', 200), photo('z', 50)])
+    assert ids(view) == ['d', 'c', 'b', 'a', 'z']
+
+
+def test_ties_go_after_photos_already_shown():
+    view = GalleryView([photo('a', 100)])
+    view.merge([photo('b', 100), photo('c', 100)])
+    assert ids(view) == ['a', 'b', 'c']
+
+
+def test_edit_replaces_photo_in_place():
+    view = GalleryView([photo('b', 200), photo('a', 100, description='old')])
+    view.merge([photo('a', 100, updated=500, version=2, description='new')])
+    assert ids(view) == ['b', 'a']
+    assert list(view)[1]['description'] == 'new'
+
+
+def test_stale_version_is_ignored():
+    view = GalleryView([photo('a', 100)])
+    view.merge([photo('a', 100, updated=500, version=3, description='newest')])
+    view.merge([photo('a', 100, updated=400, version=2, description='older')])
+    assert [p['description'] for p in view] == ['newest']
+
+
+def test_change_older_than_base_copy_is_ignored():
+    view = GalleryView([photo('b', 200), photo('a', 100, version=3, description='base'), photo('z', 50)])
+    view.merge([photo('a', 100, updated=400, version=2, description='older')])
+    assert ids(view) == ['b', 'a', 'z']
+    assert list(view)[1]['description'] == 'base'
+
+
+def test_reapplying_same_change_is_idempotent():
+    view = GalleryView([photo('b', 200), photo('a', 100)])
+    change = photo('c', 300)
+    view.merge([change])
+    view.merge([dict(change)])
+    assert ids(view) == ['c', 'b', 'a']
+
+
+def test_delete_removes_photo():
+    view = GalleryView([photo('b', 200), photo('a', 100)])
+    view.merge([photo('a', 100, updated=500, version=2, deleted=True)])
+    assert ids(view) == ['b']
+    assert len(view) == 1
+
+
+def test_delete_of_photo_added_in_session():
+    view = GalleryView([photo('a', 100)])
+    view.merge([photo('b', 200)])
+    view.merge([photo('b', 200, updated=300, version=2, deleted=True)])
+    assert ids(view) == ['a']
+
+
+def test_delete_of_unknown_photo_is_ignored():
+    view = GalleryView([photo('a', 100)])
+    view.merge([photo('x', 50, updated=500, version=2, deleted=True)])
+    assert ids(view) == ['a']
+
+
+def test_empty_view_is_falsy():
+    view = GalleryView([photo('a', 100)])
+    assert view
+    view.merge([photo('a', 100, updated=200, version=2, deleted=True)])
+    assert not view
+
+
+def test_high_water_mark_uses_newest_change():
+    assert get_high_water_mark([]) == 0
+    assert get_high_water_mark([photo('a', 100, updated=700), photo('b', 300)]) == 700
+    assert get_high_water_mark([{'photo_id': 'old', 'upload_timestamp': 250}]) == 250
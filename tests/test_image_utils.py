@@ -0,0 +1,229 @@
+# my_photo_app/tests/test_image_utils.py
+
+import io
+import struct
+import sys
+import threading
+import time
+import types
+import zlib
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from PIL import Image, ImageCms
+
+from my_photo_app import image_utils
+
+
+def make_png(size=(64, 64)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def make_jpeg(**params):
+    """A progressive JPEG with restart markers (so the scan walker sees RST, stuffed bytes and several scans)."""
+    image = Image.radial_gradient('L').convert('RGB').resize((96, 64))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90, progressive=True, restart_marker_blocks=1, **params)
+    return buffer.getvalue()
+
+
+def make_exif(orientation=6):
+    exif = Image.Exif()
+    exif[image_utils.EXIF_ORIENTATION_TAG] = orientation
+    exif[0x010E] = 'camera notes ' * 200 # ImageDescription, unneeded metadata
+    return exif.tobytes()
+
+
+def test_strip_jpeg_metadata_keeps_pixel_data_byte_for_byte():
+    data = make_jpeg(exif=make_exif(), comment=b'a comment')
+    stripped = image_utils._strip_jpeg_metadata(data, None)
+
+    assert len(stripped) < len(data)
+    # Everything from the first scan on (entropy data, restart markers, later scans, EOI) is copied as is
+    assert stripped[stripped.index(b'\xff\xda'):] == data[data.index(b'\xff\xda'):]
+    assert b'a comment' not in stripped
+    assert b'Exif' not in stripped
+    assert Image.open(io.BytesIO(stripped)).tobytes() == Image.open(io.BytesIO(data)).tobytes()
+
+
+def test_strip_jpeg_metadata_rejects_non_jpeg():
+    with pytest.raises(ValueError):
+        image_utils._strip_jpeg_metadata(make_png(), None)
+
+
+def test_jpeg_keeps_orientation_and_icc_profile():
+    icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+    data = make_jpeg(exif=make_exif(orientation=6), icc_profile=icc_profile, comment=b'a comment')
+    result = image_utils.optimize_image_bytes(data, 'photo.JPG')
+
+    assert result['bytes_saved'] > 0
+    assert result['content_type'] == 'image/jpeg'
+    assert result['extension'] == 'jpg'
+    optimized = Image.open(io.BytesIO(result['data']))
+    assert optimized.info.get('icc_profile') == icc_profile
+    assert dict(optimized.getexif()) == {image_utils.EXIF_ORIENTATION_TAG: 6}
+    assert 'comment' not in optimized.info
+    assert optimized.tobytes() == Image.open(io.BytesIO(data)).tobytes()
+
+
+def test_jpeg_with_trailing_data_is_stored_unchanged():
+    # Multi-picture (MPF) and motion photos append more data after the first image's EOI
+    data = make_jpeg(exif=make_exif()) + make_jpeg()
+    assert image_utils._strip_jpeg_metadata(data, None) is data
+    result = image_utils.optimize_image_bytes(data, 'mpf.jpg')
+    assert result['data'] is data
+    assert result['bytes_saved'] == 0
+
+
+def test_animated_images_are_stored_unchanged():
+    frames = [Image.new('RGB', (32, 32), color) for color in ((255, 0, 0), (0, 255, 0), (0, 0, 255))]
+    for image_format, filename in (('PNG', 'anim.png'), ('GIF', 'anim.gif')):
+        buffer = io.BytesIO()
+        frames[0].save(buffer, format=image_format, save_all=True, append_images=frames[1:], duration=100)
+        data = buffer.getvalue()
+        for convert_to in (None, 'webp'):
+            result = image_utils.optimize_image_bytes(data, filename, convert_to=convert_to)
+            assert result['data'] is data
+            assert result['extension'] == filename.split('.')[-1]
+
+
+def test_reencode_is_only_kept_if_smaller():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 30, 30)).save(buffer, format='PNG', optimize=True, compress_level=9)
+    data = buffer.getvalue()
+    result = image_utils.optimize_image_bytes(data, 'tiny.png')
+    assert result['data'] is data
+    assert result['optimized_size'] == result['original_size']
+
+    data = make_jpeg() # Nothing to strip
+    assert image_utils.optimize_image_bytes(data, 'plain.jpg')['data'] is data
+
+
+def test_unreadable_file_is_stored_unchanged():
+    result = image_utils.optimize_image_bytes(b'not an image', 'notes.txt')
+    assert result['data'] == b'not an image'
+    assert result['extension'] == 'txt'
+    assert result['content_type'] is None
+
+
+class BrokenPool:
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_pool_failure_falls_back_to_in_process(monkeypatch):
+    monkeypatch.setattr(image_utils, '_get_process_pool', lambda max_workers=None: BrokenPool())
+    files = [('a.jpg', make_jpeg(exif=make_exif())), ('b.png', make_png())]
+
+    results, summary = image_utils.optimize_uploads(files)
+
+    assert summary['pool_fallback']
+    assert [r['filename'] for r in results] == ['a.jpg', 'b.png']
+    assert results[0]['bytes_saved'] > 0
+    assert summary['bytes_saved'] == sum(r['bytes_saved'] for r in results)
+
+
+def test_pool_batch_does_not_rerun_streamlit_script(tmp_path, monkeypatch):
+    # Under Streamlit, __main__ is the app script; workers must not import it again
+    marker = tmp_path / 'app_ran'
+    app_script = tmp_path / 'app.py'
+    app_script.write_text(f"open({str(marker)!r}, 'w').close()\nraise SystemExit(1)\n")
+    fake_main = types.ModuleType('__main__')
+    fake_main.__file__ = str(app_script)
+    monkeypatch.setitem(sys.modules, '__main__', fake_main)
+    image_utils._reset_process_pool()
+
+    files = [(f'{i}.png', make_png()) for i in range(3)]
+    try:
+        results, summary = image_utils.optimize_uploads(files, max_workers=2)
+    finally:
+        image_utils._reset_process_pool()
+
+    assert sys.modules['__main__'] is fake_main
+    assert not summary['pool_fallback']
+    assert not marker.exists()
+    assert [r['filename'] for r in results] == ['0.png', '1.png', '2.png']
+
+
+def make_raw_png(color_type, channels, bit_depth=16, size=(16, 8)):
+    """Builds an uncompressed PNG by hand, since Pillow can't write 16-bit colour PNGs."""
+    width, height = size
+    row = bytes(i % 256 for i in range(width * channels * bit_depth // 8))
+    raw = b''.join(b'\x00' + row for _ in range(height))
+
+    def chunk(chunk_type, payload):
+        return struct.pack('>I', len(payload)) + chunk_type + payload + struct.pack('>I', zlib.crc32(chunk_type + payload))
+
+    header = struct.pack('>IIBBBBB', width, height, bit_depth, color_type, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw, 0)) + chunk(b'IEND', b'')
+
+
+def test_16_bit_colour_png_is_stored_unchanged():
+    for color_type, channels in ((2, 3), (4, 2), (6, 4)):
+        data = make_raw_png(color_type, channels)
+        result = image_utils.optimize_image_bytes(data, 'deep.png')
+        assert result['data'] is data
+        assert result['bytes_saved'] == 0
+
+
+def test_16_bit_grayscale_png_is_recompressed_losslessly():
+    data = make_raw_png(0, 1)
+    result = image_utils.optimize_image_bytes(data, 'gray.png')
+    assert result['bytes_saved'] > 0
+    original, optimized = Image.open(io.BytesIO(data)), Image.open(io.BytesIO(result['data']))
+    assert optimized.mode == original.mode
+    assert optimized.tobytes() == original.tobytes()
+
+
+class RecordingPool:
+    def __init__(self, *args, **kwargs):
+        self.shutdown_calls = []
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdown_calls.append(cancel_futures)
+
+
+def test_reset_only_discards_the_failed_pool(monkeypatch):
+    current = RecordingPool()
+    monkeypatch.setattr(image_utils, '_process_pool', current)
+
+    image_utils._reset_process_pool(RecordingPool()) # An older pool another session already replaced
+    assert image_utils._process_pool is current
+    assert current.shutdown_calls == []
+
+    image_utils._reset_process_pool(current)
+    assert image_utils._process_pool is None
+    assert current.shutdown_calls == [False] # Other sessions' queued batches are not cancelled
+
+
+def test_concurrent_batches_share_one_pool(monkeypatch):
+    created = []
+
+    class SlowPool(RecordingPool):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            time.sleep(0.05) # Widen the window for a second thread to create its own pool
+            created.append(self)
+
+        def submit(self, fn, *args):
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
+    monkeypatch.setattr(image_utils, 'ProcessPoolExecutor', SlowPool)
+    monkeypatch.setattr(image_utils, '_process_pool', None)
+    files = [('a.png', make_png()), ('b.png', make_png())]
+
+    threads = [threading.Thread(target=image_utils.optimize_uploads, args=(files,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
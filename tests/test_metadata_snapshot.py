@@ -0,0 +1,87 @@
+# my_photo_app/tests/test_metadata_snapshot.py
+
+import os
+from decimal import Decimal
+
+import pytest
+
+from my_photo_app.metadata_snapshot import HEADER, PhotoSnapshot, load_snapshot, write_snapshot
+
+
+def make_photos():
+    return [
+        {
+            'photo_id': 'b-2000', 's3_key': 'b.jpg', 's3_url': 'https://bucket/b.jpg',
+            'description': 'Grand-mère à la plage ☀', 'original_filename': 'été.jpg',
+            'upload_timestamp': Decimal(2000), 'updated_timestamp': Decimal(2500), 'version': Decimal(2),
+        },
+        {
+            'photo_id': 'a-1000', 's3_key': 'a.png', 's3_url': 'https://bucket/a.png',
+            'description': None, 'original_filename': 'a.png', 'upload_timestamp': Decimal(1000),
+        },
+    ]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'snapshot.bin')
+    write_snapshot(path, make_photos(), 2500)
+    snapshot = PhotoSnapshot(path)
+
+    assert len(snapshot) == 2
+    assert snapshot.high_water_mark == 2500
+    first, second = list(snapshot)
+    assert first == {
+        'photo_id': 'b-2000', 's3_key': 'b.jpg', 's3_url': 'https://bucket/b.jpg',
+        'description': 'Grand-mère à la plage ☀', 'original_filename': 'été.jpg',
+        'upload_timestamp': 2000, 'updated_timestamp': 2500, 'version': 2,
+    }
+    # Missing fields get defaults: empty string, updated = uploaded, version 1
+    assert second['description'] == ''
+    assert second['updated_timestamp'] == 1000
+    assert second['version'] == 1
+    assert snapshot[-1] == second
+    with pytest.raises(IndexError):
+        snapshot[2]
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / 'snapshot.bin')
+    write_snapshot(path, [], 0)
+    snapshot = load_snapshot(path)
+    assert len(snapshot) == 0
+    assert list(snapshot) == []
+
+
+def test_missing_file_loads_as_none(tmp_path):
+    assert load_snapshot(str(tmp_path / 'missing.bin')) is None
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = str(tmp_path / 'snapshot.bin')
+    write_snapshot(path, make_photos(), 2500)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:HEADER.size + 10])
+
+    with pytest.raises(ValueError):
+        PhotoSnapshot(path)
+    assert load_snapshot(path) is None
+
+
+def test_foreign_file_is_rejected(tmp_path):
+    path = str(tmp_path / 'snapshot.bin')
+    with open(path, 'wb') as f:
+        f.write(b'not a snapshot at all, just some bytes')
+    assert load_snapshot(path) is None
+
+
+def test_rewrite_replaces_file_atomically(tmp_path):
+    path = str(tmp_path / 'snapshot.bin')
+    write_snapshot(path, make_photos(), 2500)
+    old = PhotoSnapshot(path)
+    write_snapshot(path, make_photos()[:1], 3000)
+
+    assert len(PhotoSnapshot(path)) == 1
+    assert len(old) == 2 # Existing mappings keep reading the file they opened
+    assert [name for name in os.listdir(tmp_path) if name.startswith('.snapshot-')] == []